@@ -13,15 +13,13 @@ from config import DATA_DIR, REPORTS_DIR
 from data import load_datasets
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Evaluate trained model")
-    parser.add_argument("--model", required=True, help="Path to .keras model")
-    args = parser.parse_args()
+def evaluate(model, model_path: Path) -> dict:
+    """Evaluate an in-memory model on the test split and write reports.
 
+    `model_path` is only recorded in the run log; the model is not reloaded.
+    """
     _, _, test_ds = load_datasets(DATA_DIR)
 
-    model = tf.keras.models.load_model(args.model)
-
     y_true = np.concatenate([y.numpy() for _, y in test_ds])
     y_prob = model.predict(test_ds).ravel()
 
@@ -64,7 +62,7 @@ def main():
 
     row = {
         "timestamp": datetime.now().isoformat(timespec="seconds"),
-        "model_path": str(Path(args.model).resolve()),
+        "model_path": str(Path(model_path).resolve()),
         "accuracy": report["accuracy"],
         "blast_precision": report["blast"]["precision"],
         "blast_recall": report["blast"]["recall"],
@@ -87,6 +85,17 @@ def main():
     print(f"- Metrics saved to {metrics_path}")
     print(f"- Run log updated at {run_log_path}")
 
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate trained model")
+    parser.add_argument("--model", required=True, help="Path to .keras model")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    evaluate(model, args.model)
+
 
 if __name__ == "__main__":
     main()
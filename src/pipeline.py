@@ -1,20 +1,202 @@
 from __future__ import annotations
 
 import argparse
+import ast
 from datetime import datetime
+import hashlib
+import json
+import os
 from pathlib import Path
-import subprocess
+import shutil
 import sys
 
-from config import MODELS_DIR, MODEL_NAME_PREFIX
+from config import DATA_DIR, MODELS_DIR, MODEL_NAME_PREFIX, REPORTS_DIR
 
+SRC_DIR = Path(__file__).resolve().parent
+CACHE_PATH = MODELS_DIR / ".pipeline_cache.json"
+CHUNK_SIZE = 1 << 20
 
-def run(cmd: list[str]) -> None:
-    """Run a command and fail fast if it errors."""
-    print("\n$", " ".join(cmd))
-    result = subprocess.run(cmd, text=True)
-    if result.returncode != 0:
-        raise SystemExit(result.returncode)
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in chunks so large artifacts never sit in memory."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cached_digest(path: Path, files: dict) -> str:
+    """Digest of `path`, re-hashed only when its (size, mtime_ns) changed.
+
+    `files` maps absolute paths to [size, mtime_ns, digest] and is updated in place.
+    """
+    st = path.stat()
+    key = str(path.resolve())
+    entry = files.get(key)
+    if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+        return entry[2]
+    digest = file_digest(path)
+    files[key] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def tree_digest(root: Path, files: dict) -> str:
+    """SHA-256 over every file under `root` (relative path + content)."""
+    h = hashlib.sha256()
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        h.update(path.relative_to(root).as_posix().encode())
+        h.update(cached_digest(path, files).encode())
+    return h.hexdigest()
+
+
+def local_deps(entry: Path) -> list[Path]:
+    """`entry` plus every module under SRC_DIR it imports, transitively."""
+    seen: set[Path] = set()
+    stack = [entry]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                top = name.split(".")[0]
+                module = SRC_DIR / f"{top}.py"
+                package = SRC_DIR / top
+                if module.is_file():
+                    stack.append(module)
+                elif package.is_dir():
+                    stack.extend(package.rglob("*.py"))
+    return sorted(seen)
+
+
+def code_digest(entry: Path, files: dict) -> str:
+    """Combined digest of a step script and the local modules it depends on."""
+    h = hashlib.sha256()
+    for path in local_deps(entry):
+        h.update(path.relative_to(SRC_DIR).as_posix().encode())
+        h.update(cached_digest(path, files).encode())
+    return h.hexdigest()
+
+
+def step_key(*parts: str) -> str:
+    """Combine input digests/params into a single cache key for a step."""
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def load_cache() -> dict:
+    """Read the step cache; a missing or unreadable cache counts as empty."""
+    try:
+        cache = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache: dict) -> None:
+    """Write the step cache atomically so an interrupted run can't truncate it."""
+    tmp_path = CACHE_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+    os.replace(tmp_path, CACHE_PATH)
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlink `src` to `dst`, falling back to a streamed copy across filesystems.
+
+    A hardlink shares the inode: saved models are treated as immutable, so
+    replace them with a new file rather than rewriting either path in place.
+    """
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def train_step(epochs: int):
+    """Train in this process and return (model, path to saved artifact).
+
+    Uses `train.train(epochs)` when available; it must return the exact model
+    that was saved at the returned path, since evaluation reuses the object
+    but its cache key is the saved artifact. Older train.py scripts only have
+    a CLI `main()`, in which case the model is reloaded from disk for evaluation.
+    """
+    import train
+
+    if hasattr(train, "train"):
+        return train.train(epochs)
+
+    argv = sys.argv
+    sys.argv = ["train.py", "--epochs", str(epochs)]
+    try:
+        train.main()
+    finally:
+        sys.argv = argv
+    latest = max(MODELS_DIR.glob(f"{MODEL_NAME_PREFIX}*.keras"), key=lambda p: p.stat().st_mtime)
+    return None, latest
+
+
+def evaluate_step(model, model_path: Path) -> None:
+    """Evaluate in this process, reusing the trained model object when available."""
+    import evaluate
+
+    if model is None:
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(model_path)
+    evaluate.evaluate(model, model_path)
+
+
+def run_pipeline(epochs: int, tag: str = "", force: bool = False) -> Path:
+    """Run train -> evaluate, skipping steps whose input digests are unchanged."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    tag_part = f"_{tag}" if tag else ""
+    model_path = MODELS_DIR / f"{MODEL_NAME_PREFIX}{tag_part}_{timestamp}.keras"
+
+    cache = load_cache()
+    files = {k: v for k, v in cache.get("files", {}).items() if Path(k).exists()}
+    cache["files"] = files
+    data_hash = tree_digest(DATA_DIR, files)
+
+    # 1) Train (skipped when code, data and params are unchanged)
+    train_key = step_key(code_digest(SRC_DIR / "train.py", files), data_hash, f"epochs={epochs}")
+    cached_train = cache.get("train", {})
+    cached_model = Path(cached_train.get("model_path", ""))
+    if not force and cached_train.get("key") == train_key and cached_model.is_file():
+        model = None
+        print(f"\n⏭  Train inputs unchanged, reusing:\n  {cached_model}")
+        trained_path = cached_model
+    else:
+        model, trained_path = train_step(epochs)
+        cache["train"] = {"key": train_key, "model_path": str(trained_path)}
+        save_cache(cache)
+
+    # Expose the model under the requested (tagged, timestamped) pipeline name.
+    if trained_path != model_path:
+        print(f"Linking to pipeline target:\n  {model_path}")
+        link_or_copy(trained_path, model_path)
+
+    # 2) Evaluate (skipped when evaluation code, data and model are unchanged)
+    eval_key = step_key(
+        code_digest(SRC_DIR / "evaluate.py", files), data_hash, cached_digest(trained_path, files)
+    )
+    reports = [REPORTS_DIR / "confusion_matrix.png", REPORTS_DIR / "metrics.json"]
+    if not force and cache.get("evaluate", {}).get("key") == eval_key and all(p.exists() for p in reports):
+        print("\n⏭  Evaluation inputs unchanged, keeping existing reports")
+    else:
+        evaluate_step(model, model_path)
+        cache["evaluate"] = {"key": eval_key}
+    save_cache(cache)
+
+    return model_path
 
 
 def main():
@@ -26,26 +208,10 @@ def main():
         default="",
         help="Optional tag to include in model filename (e.g., v1, aug, lr1e-3)",
     )
+    parser.add_argument("--force", action="store_true", help="Re-run every step, ignoring the step cache")
     args = parser.parse_args()
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    tag_part = f"_{args.tag}" if args.tag else ""
-    model_path = MODELS_DIR / f"{MODEL_NAME_PREFIX}{tag_part}_{timestamp}.keras"
-
-    # 1) Train
-    run([sys.executable, "src/train.py", "--epochs", str(args.epochs)])
-
-    # train.py saves a timestamped model itself; to keep pipeline deterministic,
-    # we re-save the latest model to our chosen model_path if needed.
-    # Simplest: find the most recently modified .keras in MODELS_DIR.
-    latest = max(MODELS_DIR.glob(f"{MODEL_NAME_PREFIX}*.keras"), key=lambda p: p.stat().st_mtime)
-    if latest != model_path:
-        print(f"\nLatest model found:\n  {latest}")
-        print(f"Copying to pipeline target:\n  {model_path}")
-        model_path.write_bytes(latest.read_bytes())
-
-    # 2) Evaluate
-    run([sys.executable, "src/evaluate.py", "--model", str(model_path)])
+    model_path = run_pipeline(args.epochs, args.tag, args.force)
 
     print("\n✅ Pipeline complete")
     print("Model:", model_path)
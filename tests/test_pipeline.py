@@ -0,0 +1,150 @@
+import os
+from pathlib import Path
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# pipeline.py imports paths from config.py at module level; point them at a
+# throwaway location so the module can be imported without the training setup.
+_config = types.ModuleType("config")
+_config.DATA_DIR = _config.MODELS_DIR = _config.REPORTS_DIR = Path(".")
+_config.MODEL_NAME_PREFIX = "model"
+sys.modules.setdefault("config", _config)
+
+import pipeline  # noqa: E402
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Isolated src/data/models/reports tree with stubbed train and evaluate steps."""
+    src, data, models, reports = (tmp_path / name for name in ("src", "data", "models", "reports"))
+    for d in (src, data, models, reports):
+        d.mkdir()
+    (src / "train.py").write_text("import net\n")
+    (src / "net.py").write_text("LAYERS = 1\n")
+    (src / "evaluate.py").write_text("import numpy\n")
+    (data / "img.jpg").write_bytes(b"leaf")
+
+    monkeypatch.setattr(pipeline, "SRC_DIR", src)
+    monkeypatch.setattr(pipeline, "DATA_DIR", data)
+    monkeypatch.setattr(pipeline, "MODELS_DIR", models)
+    monkeypatch.setattr(pipeline, "REPORTS_DIR", reports)
+    monkeypatch.setattr(pipeline, "CACHE_PATH", models / ".pipeline_cache.json")
+
+    calls = {"train": 0, "evaluate": []}
+
+    def fake_train(epochs):
+        calls["train"] += 1
+        path = models / f"trained_{calls['train']}.keras"
+        path.write_bytes(f"weights-{calls['train']}".encode())
+        return object(), path
+
+    def fake_evaluate(model, model_path):
+        calls["evaluate"].append(model)
+        (reports / "confusion_matrix.png").write_bytes(b"png")
+        (reports / "metrics.json").write_text("{}")
+
+    monkeypatch.setattr(pipeline, "train_step", fake_train)
+    monkeypatch.setattr(pipeline, "evaluate_step", fake_evaluate)
+    return tmp_path, calls
+
+
+def test_unchanged_inputs_skip_both_steps(workspace):
+    _, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+    pipeline.run_pipeline(epochs=1)
+
+    assert calls["train"] == 1
+    assert len(calls["evaluate"]) == 1
+
+
+def test_trained_model_object_is_passed_to_evaluation(workspace):
+    _, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+
+    assert calls["evaluate"][0] is not None
+
+
+def test_evaluate_change_reruns_only_evaluation(workspace):
+    root, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+    (root / "src" / "evaluate.py").write_text("import numpy\nTHRESHOLD = 0.6\n")
+    pipeline.run_pipeline(epochs=1)
+
+    assert calls["train"] == 1
+    assert len(calls["evaluate"]) == 2
+    # Reused model comes from disk, not from a training run in this process.
+    assert calls["evaluate"][1] is None
+
+
+def test_imported_local_module_change_retrains(workspace):
+    root, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+    (root / "src" / "net.py").write_text("LAYERS = 2\n")
+    pipeline.run_pipeline(epochs=1)
+
+    assert calls["train"] == 2
+
+
+def test_epochs_change_retrains(workspace):
+    _, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+    pipeline.run_pipeline(epochs=2)
+
+    assert calls["train"] == 2
+
+
+def test_cache_hit_still_creates_tagged_model(workspace):
+    _, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+    model_path = pipeline.run_pipeline(epochs=1, tag="aug")
+
+    assert calls["train"] == 1
+    assert "_aug_" in model_path.name
+    assert model_path.read_bytes() == b"weights-1"
+
+
+def test_unchanged_files_are_not_rehashed(workspace, monkeypatch):
+    pipeline.run_pipeline(epochs=1)
+
+    def fail(path):
+        raise AssertionError(f"re-hashed {path}")
+
+    monkeypatch.setattr(pipeline, "file_digest", fail)
+    pipeline.run_pipeline(epochs=1)
+
+
+def test_corrupt_cache_is_treated_as_empty(workspace):
+    root, calls = workspace
+    pipeline.run_pipeline(epochs=1)
+    (root / "models" / ".pipeline_cache.json").write_text('{"train": {"ke')
+    pipeline.run_pipeline(epochs=1)
+
+    assert calls["train"] == 2
+
+
+def test_link_or_copy_falls_back_to_copy(tmp_path, monkeypatch):
+    src = tmp_path / "a.keras"
+    dst = tmp_path / "b.keras"
+    src.write_bytes(b"weights")
+
+    def no_link(*args):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(os, "link", no_link)
+    pipeline.link_or_copy(src, dst)
+
+    assert dst.read_bytes() == b"weights"
+    assert not os.path.samefile(src, dst)
+
+
+def test_link_or_copy_hardlinks(tmp_path):
+    src = tmp_path / "a.keras"
+    dst = tmp_path / "b.keras"
+    src.write_bytes(b"weights")
+    pipeline.link_or_copy(src, dst)
+
+    assert os.path.samefile(src, dst)